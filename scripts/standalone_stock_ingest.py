@@ -11,26 +11,63 @@ Features:
 from __future__ import annotations
 
 import argparse
-import io
+import functools
+import http.client
+import itertools
 import json
+import operator
 import os
+import queue
 import re
+import shutil
 import sqlite3
 import sys
+import tempfile
+import threading
+import time
 import uuid
 import xml.etree.ElementTree as ET
 import zipfile
+import zlib
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import closing, contextmanager
 from dataclasses import dataclass
 from datetime import UTC, date, datetime, timedelta
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal, TypeVar
 from urllib.error import HTTPError, URLError
-from urllib.parse import urlencode
-from urllib.request import Request, urlopen
+from urllib.parse import urlencode, urlsplit
+from urllib.request import Request, getproxies, proxy_bypass, urlopen
+
+try:
+    from lxml import etree as _LXML_ETREE
+except ImportError:
+    _LXML_ETREE = None
+
+try:
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
 
 DEFAULT_SQLITE_PATH = "~/.openclaw/workspace/data/stockfinder_standalone.db"
 DEFAULT_KIS_BASE_URL = "https://openapi.koreainvestment.com:9443"
 DEFAULT_DART_BASE_URL = "https://opendart.fss.or.kr/api"
+DEFAULT_KIS_WORKERS = 8
+MARGIN_CHUNK_SIZE = 200
+EVENT_CHUNK_SIZE = 500
+FUNDAMENTAL_BATCH_ROWS = 500
+SYMBOL_INFO_TTL_DAYS = 7
+# KIS REST quota is ~20 req/s per app key
+DEFAULT_KIS_MAX_RPS = 15.0
+KIS_TOKEN_EXPIRY_MARGIN_SEC = 60
+DEFAULT_SQLITE_CACHE_MIB = 64
+DEFAULT_SQLITE_MMAP_BYTES = 256 * 1024 * 1024
+# STOCK_INGEST_RAW_PAYLOAD: json (default, text) | zlib (compressed BLOB) | off (NULL)
+RAW_PAYLOAD_MODES = {"json", "zlib", "off", "0", "none", "false"}
+RAW_PAYLOAD_MODE = (os.environ.get("STOCK_INGEST_RAW_PAYLOAD") or "json").strip().lower()
+_RAW_PAYLOAD_OFF = RAW_PAYLOAD_MODE in {"0", "off", "none", "false"}
+_RAW_PAYLOAD_ZLIB = RAW_PAYLOAD_MODE == "zlib"
 
 RUN_TYPES = {"symbols", "prices", "fundamental", "financials", "events", "margins", "all"}
 RUN_TYPE_TO_CATEGORIES: dict[str, tuple[str, ...]] = {
@@ -43,6 +80,19 @@ RUN_TYPE_TO_CATEGORIES: dict[str, tuple[str, ...]] = {
     "all": ("symbols", "prices", "financials", "events", "margins"),
 }
 
+CAT_SYMBOLS, CAT_PRICES, CAT_FINANCIALS, CAT_EVENTS, CAT_MARGINS = 1, 2, 4, 8, 16
+CATEGORY_BITS = {
+    "symbols": CAT_SYMBOLS,
+    "prices": CAT_PRICES,
+    "financials": CAT_FINANCIALS,
+    "events": CAT_EVENTS,
+    "margins": CAT_MARGINS,
+}
+
+# symbols only calls KIS for scope=single
+KIS_CATEGORIES = frozenset({"prices", "financials", "margins"})
+KIS_CATEGORY_MASK = functools.reduce(operator.or_, (CATEGORY_BITS[cat] for cat in KIS_CATEGORIES))
+
 PRICES_WINDOWS = {
     "fast": 7,
     "normal": 30,
@@ -50,7 +100,6 @@ PRICES_WINDOWS = {
 }
 
 SCHEMA_SQL = """
-PRAGMA journal_mode=WAL;
 PRAGMA foreign_keys=ON;
 
 CREATE TABLE IF NOT EXISTS ingest_runs (
@@ -77,6 +126,13 @@ CREATE TABLE IF NOT EXISTS ingest_runs (
   error_message TEXT
 );
 
+CREATE TABLE IF NOT EXISTS ingest_run_notes (
+  run_id TEXT NOT NULL,
+  idx INTEGER NOT NULL,
+  message TEXT NOT NULL,
+  PRIMARY KEY(run_id, idx)
+);
+
 CREATE TABLE IF NOT EXISTS symbol_universe (
   stock_code TEXT PRIMARY KEY,
   name TEXT,
@@ -86,7 +142,8 @@ CREATE TABLE IF NOT EXISTS symbol_universe (
   listed_date TEXT,
   is_active INTEGER NOT NULL DEFAULT 1,
   is_delisted INTEGER NOT NULL DEFAULT 0,
-  updated_at TEXT NOT NULL
+  updated_at TEXT NOT NULL,
+  info_refreshed_at TEXT
 );
 
 CREATE TABLE IF NOT EXISTS raw_price_ohlcv (
@@ -142,6 +199,12 @@ CREATE TABLE IF NOT EXISTS raw_event_feed (
   UNIQUE(source, source_event_id)
 );
 
+CREATE TABLE IF NOT EXISTS kis_token_cache (
+  app_key TEXT PRIMARY KEY,
+  access_token TEXT NOT NULL,
+  expires_at TEXT NOT NULL
+);
+
 CREATE TABLE IF NOT EXISTS symbol_margin_policy (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   run_id TEXT NOT NULL,
@@ -154,9 +217,24 @@ CREATE TABLE IF NOT EXISTS symbol_margin_policy (
   collected_at TEXT NOT NULL,
   UNIQUE(stock_code, as_of)
 );
+
+-- db-check counts rows per run
+CREATE INDEX IF NOT EXISTS idx_price_run ON raw_price_ohlcv(run_id);
+CREATE INDEX IF NOT EXISTS idx_fundamental_run ON raw_fundamental_statement(run_id);
+CREATE INDEX IF NOT EXISTS idx_event_run ON raw_event_feed(run_id);
+CREATE INDEX IF NOT EXISTS idx_margin_run ON symbol_margin_policy(run_id);
 """
 
 
+_RE_YMD8 = re.compile(r"\d{8}")
+_RE_YMD6 = re.compile(r"\d{6}")
+_RE_NONDIGIT = re.compile(r"\D")
+_RE_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# non-metric columns in the KIS finance responses
+_FUNDAMENTAL_SKIP_KEYS = frozenset({"stac_yymm", "acml_tr_pbmn", "acml_ntin", "flet_riml_rt", "self_cptl_rt"})
+
+
 class SetupError(RuntimeError):
     pass
 
@@ -168,6 +246,7 @@ class SymbolEntry:
     market: str | None = None
     dart_corp_code: str | None = None
     listed_date: str | None = None  # YYYYMMDD
+    info_refreshed_at: str | None = None
 
 
 def now_iso() -> str:
@@ -178,18 +257,25 @@ def today() -> date:
     return datetime.now(UTC).date()
 
 
+def _clean_str(value: Any) -> str:
+    if type(value) is str:
+        return value.strip()
+    return "" if value is None else str(value).strip()
+
+
 def normalize_symbol(value: str) -> str | None:
-    digits = "".join(ch for ch in str(value).strip() if ch.isdigit())
+    digits = _RE_NONDIGIT.sub("", str(value))
     if not digits or len(digits) > 6:
         return None
     return digits.zfill(6)
 
 
+@functools.lru_cache(maxsize=4096)
 def to_yyyymmdd(value: str | None) -> str | None:
     if not value:
         return None
     raw = str(value).strip()
-    if re.fullmatch(r"\d{8}", raw):
+    if _RE_YMD8.fullmatch(raw):
         return raw
     for fmt in ("%Y-%m-%d", "%Y/%m/%d"):
         try:
@@ -202,6 +288,7 @@ def to_yyyymmdd(value: str | None) -> str | None:
         return None
 
 
+@functools.lru_cache(maxsize=4096)
 def to_iso_date(value: str | None) -> str | None:
     ymd = to_yyyymmdd(value)
     if not ymd:
@@ -209,10 +296,21 @@ def to_iso_date(value: str | None) -> str | None:
     return f"{ymd[:4]}-{ymd[4:6]}-{ymd[6:8]}"
 
 
+def fast_ymd_to_iso(value: str) -> str | None:
+    if len(value) == 8 and value.isascii() and value.isdigit():
+        return f"{value[:4]}-{value[4:6]}-{value[6:8]}"
+    return None
+
+
 def to_float_or_none(value: Any) -> float | None:
     if value is None:
         return None
-    raw = str(value).strip()
+    return _parse_float(value if type(value) is str else str(value))
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_float(value: str) -> float | None:
+    raw = value.strip()
     if not raw:
         return None
     raw = raw.replace(",", "").replace("%", "")
@@ -222,32 +320,145 @@ def to_float_or_none(value: Any) -> float | None:
         return None
 
 
-def http_get_json(url: str, headers: dict[str, str] | None = None, timeout: float = 20.0) -> Any:
-    req = Request(url=url, method="GET", headers=headers or {"Accept": "application/json"})
+_STALE_CONNECTION_ERRORS = (
+    http.client.BadStatusLine,
+    http.client.CannotSendRequest,
+    http.client.ResponseNotReady,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+
+class HttpSession:
+    """Keep-alive HTTP client: one persistent connection per (thread, host).
+
+    Requests that need an environment proxy, or that get redirected, go through ``urlopen``
+    so behaviour matches the plain urllib path.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all: list[http.client.HTTPConnection] = []
+
+    def _connection(self, scheme: str, netloc: str, timeout: float) -> tuple[http.client.HTTPConnection, bool]:
+        pool: dict[tuple[str, str], http.client.HTTPConnection] = self._local.__dict__.setdefault("pool", {})
+        conn = pool.get((scheme, netloc))
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        conn = cls(netloc, timeout=timeout)
+        pool[(scheme, netloc)] = conn
+        with self._lock:
+            self._all.append(conn)
+        return conn, False
+
+    def _drop(self, scheme: str, netloc: str) -> None:
+        conn = self._local.__dict__.get("pool", {}).pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str],
+        body: bytes | None = None,
+        timeout: float = 20.0,
+    ) -> tuple[int, bytes]:
+        parts = urlsplit(url)
+        if parts.scheme not in {"http", "https"} or (getproxies().get(parts.scheme) and not proxy_bypass(parts.hostname or "")):
+            return _urlopen_request(method, url, headers, body, timeout)
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+        while True:
+            conn, reused = self._connection(parts.scheme, parts.netloc, timeout)
+            try:
+                conn.request(method, target, body=body, headers=headers)
+                resp = conn.getresponse()
+                data = resp.read()
+            except _STALE_CONNECTION_ERRORS:
+                self._drop(parts.scheme, parts.netloc)
+                if reused:
+                    continue  # stale keep-alive connection; retry once
+                raise
+            except Exception:
+                self._drop(parts.scheme, parts.netloc)
+                raise
+            if resp.will_close:
+                self._drop(parts.scheme, parts.netloc)
+            if 300 <= resp.status < 400 and resp.getheader("Location"):
+                return _urlopen_request(method, url, headers, body, timeout)
+            return resp.status, data
+
+    def close(self) -> None:
+        with self._lock:
+            conns, self._all = self._all, []
+        for conn in conns:
+            conn.close()
+        self._local = threading.local()
+
+
+def _urlopen_request(
+    method: str,
+    url: str,
+    headers: dict[str, str],
+    body: bytes | None,
+    timeout: float,
+) -> tuple[int, bytes]:
+    req = Request(url=url, method=method, headers=headers, data=body)
     try:
         with urlopen(req, timeout=timeout) as resp:
-            return json.loads(resp.read().decode("utf-8"))
+            return resp.status, resp.read()
     except HTTPError as exc:
-        body = exc.read().decode("utf-8", errors="ignore")
-        raise RuntimeError(f"HTTP {exc.code} {url}: {body[:300]}") from exc
-    except URLError as exc:
-        raise RuntimeError(f"URL error {url}: {exc}") from exc
+        return exc.code, exc.read()
+
+
+_SESSION = HttpSession()
 
 
-def http_post_json(url: str, payload: dict[str, Any], headers: dict[str, str] | None = None, timeout: float = 20.0) -> Any:
+def _http_json(
+    method: str,
+    url: str,
+    headers: dict[str, str],
+    body: bytes | None,
+    timeout: float,
+    session: HttpSession | None = None,
+) -> Any:
+    try:
+        status, data = (session or _SESSION).request(method, url, headers=headers, body=body, timeout=timeout)
+    except (OSError, http.client.HTTPException) as exc:
+        raise RuntimeError(f"URL error {url}: {exc}") from exc
+    if status >= 400:
+        raise RuntimeError(f"HTTP {status} {url}: {data.decode('utf-8', errors='ignore')[:300]}")
+    return _orjson.loads(data) if _orjson is not None else json.loads(data.decode("utf-8"))
+
+
+def http_get_json(
+    url: str,
+    headers: dict[str, str] | None = None,
+    timeout: float = 20.0,
+    session: HttpSession | None = None,
+) -> Any:
+    return _http_json("GET", url, headers or {"Accept": "application/json"}, None, timeout, session)
+
+
+def http_post_json(
+    url: str,
+    payload: dict[str, Any],
+    headers: dict[str, str] | None = None,
+    timeout: float = 20.0,
+    session: HttpSession | None = None,
+) -> Any:
     body = json.dumps(payload).encode("utf-8")
     req_headers = {"Content-Type": "application/json", "Accept": "application/json"}
     if headers:
         req_headers.update(headers)
-    req = Request(url=url, method="POST", headers=req_headers, data=body)
-    try:
-        with urlopen(req, timeout=timeout) as resp:
-            return json.loads(resp.read().decode("utf-8"))
-    except HTTPError as exc:
-        err_body = exc.read().decode("utf-8", errors="ignore")
-        raise RuntimeError(f"HTTP {exc.code} {url}: {err_body[:300]}") from exc
-    except URLError as exc:
-        raise RuntimeError(f"URL error {url}: {exc}") from exc
+    return _http_json("POST", url, req_headers, body, timeout, session)
 
 
 class KisClient:
@@ -258,17 +469,82 @@ class KisClient:
         base_url: str,
         timeout: float,
         account_no: str = "",
+        max_rps: float = DEFAULT_KIS_MAX_RPS,
+        token_cache_path: Path | None = None,
     ):
         self.app_key = app_key
         self.app_secret = app_secret
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
         self.account_no = str(account_no or "").strip()
+        self.max_rps = max_rps
+        self.token_cache_path = token_cache_path
         self._access_token: str | None = None
+        self._token_lock = threading.Lock()
+        self._throttle_lock = threading.Lock()
+        self._next_request_at = 0.0
+        self.session = HttpSession()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _throttle(self) -> None:
+        if self.max_rps <= 0:
+            return
+        with self._throttle_lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + 1.0 / self.max_rps
+        if wait > 0:
+            time.sleep(wait)
 
     def _token(self) -> str:
         if self._access_token:
             return self._access_token
+        with self._token_lock:
+            if self._access_token:
+                return self._access_token
+            cached = self._load_cached_token()
+            if cached:
+                self._access_token = cached
+                return cached
+            return self._issue_token()
+
+    def warm_token(self) -> None:
+        self._token()
+
+    def _load_cached_token(self) -> str | None:
+        if self.token_cache_path is None:
+            return None
+        try:
+            with closing(sqlite3.connect(self.token_cache_path)) as conn:
+                found = conn.execute(
+                    "SELECT access_token FROM kis_token_cache WHERE app_key = ? AND expires_at > ?",
+                    (self.app_key, now_iso()),
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        return str(found[0]) if found else None
+
+    def _store_cached_token(self, token: str, expires_in: Any) -> None:
+        if self.token_cache_path is None:
+            return
+        try:
+            ttl = int(expires_in)
+        except (TypeError, ValueError):
+            return
+        expires_at = (datetime.now(UTC) + timedelta(seconds=ttl - KIS_TOKEN_EXPIRY_MARGIN_SEC)).isoformat()
+        try:
+            # timeout=0: skip caching while a run transaction holds the write lock
+            with closing(sqlite3.connect(self.token_cache_path, timeout=0)) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO kis_token_cache (app_key, access_token, expires_at) VALUES (?, ?, ?)",
+                    (self.app_key, token, expires_at),
+                )
+        except sqlite3.Error:
+            pass
+
+    def _issue_token(self) -> str:
         payload = {
             "grant_type": "client_credentials",
             "appkey": self.app_key,
@@ -278,24 +554,28 @@ class KisClient:
             f"{self.base_url}/oauth2/tokenP",
             payload=payload,
             timeout=self.timeout,
+            session=self.session,
         )
         token = data.get("access_token") if isinstance(data, dict) else None
         if not token:
             raise RuntimeError("KIS access_token 발급 실패")
         self._access_token = str(token)
+        self._store_cached_token(self._access_token, data.get("expires_in"))
         return self._access_token
 
     def _get(self, path: str, params: dict[str, Any], tr_id: str) -> dict[str, Any]:
         query = urlencode({k: v for k, v in params.items() if v is not None}, doseq=True)
         url = f"{self.base_url}{path}?{query}"
+        token = self._token()
+        self._throttle()
         headers = {
             "Accept": "application/json",
-            "Authorization": f"Bearer {self._token()}",
+            "Authorization": f"Bearer {token}",
             "appkey": self.app_key,
             "appsecret": self.app_secret,
             "tr_id": tr_id,
         }
-        data = http_get_json(url=url, headers=headers, timeout=self.timeout)
+        data = http_get_json(url=url, headers=headers, timeout=self.timeout, session=self.session)
         return data if isinstance(data, dict) else {}
 
     def fetch_stock_info(self, symbol: str) -> dict[str, Any]:
@@ -343,14 +623,14 @@ class KisClient:
             for raw in output:
                 if not isinstance(raw, dict):
                     continue
-                candle_at = str(raw.get("stck_bsop_date", "")).strip()
+                candle_at = _clean_str(raw.get("stck_bsop_date"))
                 if not candle_at:
                     continue
                 rows.append(
                     {
                         "symbol": symbol,
                         "timeframe": timeframe,
-                        "candle_at": candle_at,
+                        "candle_at": fast_ymd_to_iso(candle_at) or candle_at,
                         "open": raw.get("stck_oprc", "0"),
                         "high": raw.get("stck_hgpr", "0"),
                         "low": raw.get("stck_lwpr", "0"),
@@ -383,7 +663,6 @@ class KisClient:
             ("/uapi/domestic-stock/v1/finance/other-major-ratios", "FHKST66430500", "ETC"),
         ]
         rows: list[dict[str, Any]] = []
-        skip_keys = {"stac_yymm", "acml_tr_pbmn", "acml_ntin", "flet_riml_rt", "self_cptl_rt"}
         for div_cls, term in (("0", "annual"), ("1", "quarterly")):
             for path, tr_id, report_type in endpoints:
                 data = self._get(
@@ -403,32 +682,31 @@ class KisClient:
                 for item in output:
                     if not isinstance(item, dict):
                         continue
-                    period = str(item.get("stac_yymm", "")).strip()
-                    if not re.fullmatch(r"\d{6}", period):
+                    period = _clean_str(item.get("stac_yymm"))
+                    if not _RE_YMD6.fullmatch(period):
                         continue
+                    source_key_prefix = f"{symbol}:{report_type}:{period}:{term}:"
                     for key, value in item.items():
-                        if key in skip_keys or key == "stac_yymm":
-                            continue
-                        val = str(value).strip() if value is not None else ""
-                        if not val:
+                        if value is None or value == "" or key in _FUNDAMENTAL_SKIP_KEYS:
                             continue
                         try:
-                            num = float(val.replace(",", ""))
+                            num = float(str(value).replace(",", ""))
                         except ValueError:
                             continue
+                        item_key = key.upper()
                         rows.append(
                             {
                                 "symbol": symbol,
                                 "report_type": report_type,
                                 "period_yyyymm": period,
                                 "report_term": term,
-                                "item_key": key.upper(),
-                                "item_label": key.upper(),
+                                "item_key": item_key,
+                                "item_label": item_key,
                                 "item_value": num,
                                 "unit": None,
                                 "currency": "KRW",
                                 "source": "kis",
-                                "source_key": f"{symbol}:{report_type}:{period}:{term}:{key}",
+                                "source_key": source_key_prefix + key,
                                 "raw": item,
                             }
                         )
@@ -447,17 +725,13 @@ class KisClient:
         for symbol in symbols:
             try:
                 data = self._get(
-                    "/uapi/domestic-stock/v1/trading/inquire-psbl-order",
+                    "/uapi/domestic-stock/v1/trading/intgr-margin",
                     {
                         "CANO": cano,
                         "ACNT_PRDT_CD": acnt_prdt_cd,
                         "PDNO": symbol,
-                        "ORD_UNPR": "0",
-                        "ORD_DVSN": "01",
-                        "CMA_EVLU_AMT_ICLD_YN": "Y",
-                        "OVRS_ICLD_YN": "N",
                     },
-                    tr_id="TTTC8908R",
+                    tr_id="TTTC0869R",
                 )
                 if str(data.get("rt_cd")) != "0":
                     rows.append(
@@ -466,27 +740,14 @@ class KisClient:
                             "margin_rate_pct": None,
                             "is_full_margin": False,
                             "collection_status": "failed",
-                            "message": str(data.get("msg1", "조회 실패")).strip() or "조회 실패",
+                            "message": _clean_str(data.get("msg1")) or "증거금 정보 없음",
                         }
                     )
                     continue
 
-                data2 = self._get(
-                    "/uapi/domestic-stock/v1/trading/intgr-margin",
-                    {
-                        "CANO": cano,
-                        "ACNT_PRDT_CD": acnt_prdt_cd,
-                        "PDNO": symbol,
-                    },
-                    tr_id="TTTC0869R",
-                )
-
-                margin_rate_pct: float | None = None
-                is_full = False
-                if str(data2.get("rt_cd")) == "0":
-                    output2 = data2.get("output", {}) if isinstance(data2.get("output"), dict) else {}
-                    margin_rate_pct = to_float_or_none(output2.get("acmga_rt"))
-                    is_full = bool(margin_rate_pct is not None and margin_rate_pct >= 100.0)
+                output = data.get("output", {}) if isinstance(data.get("output"), dict) else {}
+                margin_rate_pct = to_float_or_none(output.get("acmga_rt"))
+                is_full = bool(margin_rate_pct is not None and margin_rate_pct >= 100.0)
 
                 if margin_rate_pct is not None:
                     message = f"증거금율 {margin_rate_pct}%"
@@ -517,101 +778,289 @@ class KisClient:
         return rows
 
 
-def fetch_dart_corp_codes(api_key: str, timeout: float, dart_base_url: str) -> list[SymbolEntry]:
-    url = f"{dart_base_url.rstrip('/')}/corpCode.xml?crtfc_key={api_key}"
-    req = Request(url=url, method="GET")
-    try:
-        with urlopen(req, timeout=timeout) as resp:
-            data = resp.read()
-    except HTTPError as exc:
-        body = exc.read().decode("utf-8", errors="ignore")
-        raise RuntimeError(f"DART corpCode HTTP {exc.code}: {body[:200]}") from exc
-    except URLError as exc:
-        raise RuntimeError(f"DART corpCode URL error: {exc}") from exc
+_T = TypeVar("_T")
+_R = TypeVar("_R")
 
-    try:
-        with zipfile.ZipFile(io.BytesIO(data)) as zf:
-            xml_name = zf.namelist()[0]
-            xml_data = zf.read(xml_name)
-    except Exception as exc:  # noqa: BLE001
-        raise RuntimeError("DART corpCode ZIP 파싱 실패") from exc
 
-    root = ET.fromstring(xml_data)
-    out: list[SymbolEntry] = []
-    for node in root.findall("./list"):
-        stock_code = normalize_symbol(node.findtext("stock_code", default=""))
-        if not stock_code:
-            continue
-        out.append(
-            SymbolEntry(
-                stock_code=stock_code,
-                name=(node.findtext("corp_name") or "").strip() or None,
-                dart_corp_code=(node.findtext("corp_code") or "").strip() or None,
-                listed_date=None,
+def fetch_concurrently(
+    fetch: Callable[[_T], _R],
+    items: Iterable[_T],
+    max_workers: int = DEFAULT_KIS_WORKERS,
+) -> Iterator[tuple[_T, _R]]:
+    # results are yielded on the calling thread; at most 2x max_workers fetches are in flight.
+    # The first failing fetch is re-raised and pending work is cancelled.
+    workers = max(1, max_workers)
+    executor = ThreadPoolExecutor(max_workers=workers)
+    source = iter(items)
+    in_flight: dict[Future[_R], _T] = {}
+    try:
+        while True:
+            for item in itertools.islice(source, 2 * workers - len(in_flight)):
+                in_flight[executor.submit(fetch, item)] = item
+            if not in_flight:
+                return
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = in_flight.pop(future)
+                yield item, future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def fetch_all_prices(
+    client: KisClient,
+    symbols: list[SymbolEntry],
+    timeframes: list[str],
+    price_range: Callable[[SymbolEntry], tuple[str | None, str | None]],
+    max_pages: int,
+    max_workers: int = DEFAULT_KIS_WORKERS,
+) -> Iterator[tuple[SymbolEntry, list[dict[str, Any]]]]:
+    def fetch(sym: SymbolEntry) -> list[dict[str, Any]]:
+        date_from, date_to = price_range(sym)
+        rows: list[dict[str, Any]] = []
+        for tf in timeframes:
+            rows.extend(
+                client.fetch_price_rows(
+                    symbol=sym.stock_code,
+                    timeframe=tf,
+                    date_from=date_from,
+                    date_to=date_to,
+                    max_pages=max_pages,
+                )
             )
-        )
+        return rows
+
+    return fetch_concurrently(fetch, symbols, max_workers)
+
+
+def fetch_all_fundamentals(
+    client: KisClient,
+    symbols: list[SymbolEntry],
+    max_workers: int = DEFAULT_KIS_WORKERS,
+) -> Iterator[tuple[SymbolEntry, list[dict[str, Any]]]]:
+    return fetch_concurrently(lambda sym: client.fetch_fundamental_rows(sym.stock_code), symbols, max_workers)
+
+
+def fetch_all_stock_info(
+    client: KisClient,
+    symbols: list[SymbolEntry],
+    max_workers: int = DEFAULT_KIS_WORKERS,
+) -> dict[str, dict[str, Any] | Exception]:
+    def fetch(sym: SymbolEntry) -> dict[str, Any] | Exception:
+        try:
+            return client.fetch_stock_info(sym.stock_code)
+        except Exception as exc:  # noqa: BLE001
+            return exc
+
+    return {sym.stock_code: info for sym, info in fetch_concurrently(fetch, symbols, max_workers)}
+
+
+def fetch_all_margins(
+    client: KisClient,
+    symbols: list[str],
+    max_workers: int = DEFAULT_KIS_WORKERS,
+    chunk_size: int = MARGIN_CHUNK_SIZE,
+) -> list[dict[str, Any]]:
+    size = max(1, min(chunk_size, -(-len(symbols) // max(1, max_workers))))
+    chunks = [symbols[i : i + size] for i in range(0, len(symbols), size)]
+    results = dict(fetch_concurrently(lambda idx: client.fetch_margin_rows(chunks[idx]), range(len(chunks)), max_workers))
+    return [item for idx in range(len(chunks)) for item in results[idx]]
+
+
+def iter_xml_elements(source: Any, tag: str) -> Iterator[Any]:
+    etree = _LXML_ETREE or ET
+    context = etree.iterparse(source, events=("start", "end"))
+    _event, root = next(context)
+    for event, elem in context:
+        if event == "end" and elem.tag == tag:
+            yield elem
+            root.clear()
+
+
+def fetch_dart_corp_codes(api_key: str, timeout: float, dart_base_url: str) -> list[SymbolEntry]:
+    url = f"{dart_base_url.rstrip('/')}/corpCode.xml?crtfc_key={api_key}"
+    req = Request(url=url, method="GET")
+    # spill to disk past 16 MiB
+    with tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024) as spool:
+        try:
+            with urlopen(req, timeout=timeout) as resp:
+                shutil.copyfileobj(resp, spool)
+        except HTTPError as exc:
+            body = exc.read().decode("utf-8", errors="ignore")
+            raise RuntimeError(f"DART corpCode HTTP {exc.code}: {body[:200]}") from exc
+        except URLError as exc:
+            raise RuntimeError(f"DART corpCode URL error: {exc}") from exc
+        spool.seek(0)
+
+        out: list[SymbolEntry] = []
+        try:
+            with zipfile.ZipFile(spool) as zf, zf.open(zf.namelist()[0]) as xml_stream:
+                for node in iter_xml_elements(xml_stream, "list"):
+                    stock_code = normalize_symbol(node.findtext("stock_code", default=""))
+                    if not stock_code:
+                        continue
+                    out.append(
+                        SymbolEntry(
+                            stock_code=stock_code,
+                            name=(node.findtext("corp_name") or "").strip() or None,
+                            dart_corp_code=(node.findtext("corp_code") or "").strip() or None,
+                            listed_date=None,
+                        )
+                    )
+        except (zipfile.BadZipFile, zlib.error, EOFError, IndexError) as exc:
+            raise RuntimeError("DART corpCode ZIP 파싱 실패") from exc
     return out
 
 
-def fetch_dart_events(
+def iter_dart_events(
     api_key: str,
     dart_base_url: str,
     corp_code: str,
     begin_date: str,
     end_date: str,
     timeout: float,
-) -> list[dict[str, Any]]:
+) -> Iterator[dict[str, Any]]:
     # https://opendart.fss.or.kr/api/list.json
-    query = urlencode(
-        {
-            "crtfc_key": api_key,
-            "corp_code": corp_code,
-            "bgn_de": begin_date,
-            "end_de": end_date,
-            "page_count": 100,
-        }
-    )
-    url = f"{dart_base_url.rstrip('/')}/list.json?{query}"
-    payload = http_get_json(url=url, timeout=timeout)
-    if not isinstance(payload, dict):
-        return []
-    if payload.get("status") != "000":
-        return []
-    items = payload.get("list")
-    if not isinstance(items, list):
-        return []
-    rows: list[dict[str, Any]] = []
-    for item in items:
-        if not isinstance(item, dict):
-            continue
-        rcept_no = str(item.get("rcept_no", "")).strip()
-        if not rcept_no:
-            continue
-        rcept_dt = str(item.get("rcept_dt", "")).strip()
-        event_time = f"{rcept_dt[:4]}-{rcept_dt[4:6]}-{rcept_dt[6:8]}T00:00:00+00:00" if re.fullmatch(r"\d{8}", rcept_dt) else now_iso()
-        rows.append(
+    page_no = 1
+    while True:
+        query = urlencode(
             {
+                "crtfc_key": api_key,
+                "corp_code": corp_code,
+                "bgn_de": begin_date,
+                "end_de": end_date,
+                "page_no": page_no,
+                "page_count": 100,
+            }
+        )
+        url = f"{dart_base_url.rstrip('/')}/list.json?{query}"
+        payload = http_get_json(url=url, timeout=timeout)
+        if not isinstance(payload, dict):
+            return
+        if payload.get("status") != "000":
+            return
+        items = payload.get("list")
+        if not isinstance(items, list) or not items:
+            return
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            rcept_no = _clean_str(item.get("rcept_no"))
+            if not rcept_no:
+                continue
+            rcept_dt = _clean_str(item.get("rcept_dt"))
+            event_time = f"{rcept_dt[:4]}-{rcept_dt[4:6]}-{rcept_dt[6:8]}T00:00:00+00:00" if _RE_YMD8.fullmatch(rcept_dt) else now_iso()
+            yield {
                 "event_time": event_time,
                 "event_type": "dart_disclosure",
                 "severity": 3,
-                "headline": str(item.get("report_nm", "")).strip() or "DART disclosure",
-                "summary": str(item.get("flr_nm", "")).strip() or None,
+                "headline": _clean_str(item.get("report_nm")) or "DART disclosure",
+                "summary": _clean_str(item.get("flr_nm")) or None,
                 "source": "dart",
                 "source_event_id": rcept_no,
                 "raw": item,
             }
-        )
-    return rows
+        try:
+            total_page = int(payload.get("total_page") or 1)
+        except (TypeError, ValueError):
+            total_page = 1
+        if page_no >= total_page:
+            return
+        page_no += 1
 
 
-def connect_sqlite(path: Path) -> sqlite3.Connection:
+def ingest_pragmas() -> tuple[str, ...]:
+    try:
+        cache_mib = int(os.environ.get("STOCK_INGEST_CACHE_MIB", DEFAULT_SQLITE_CACHE_MIB))
+    except ValueError:
+        cache_mib = DEFAULT_SQLITE_CACHE_MIB
+    return (
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA temp_store=MEMORY",
+        f"PRAGMA cache_size={-max(1, cache_mib) * 1024}",
+        f"PRAGMA mmap_size={DEFAULT_SQLITE_MMAP_BYTES}",
+        "PRAGMA wal_autocheckpoint=10000",
+    )
+
+
+def connect_sqlite(path: Path, check_same_thread: bool = True) -> sqlite3.Connection:
     path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(path)
+    conn = sqlite3.connect(path, check_same_thread=check_same_thread, cached_statements=256)
     conn.execute("PRAGMA foreign_keys=ON")
+    # WAL is persisted in the db file; only switch once
+    if str(conn.execute("PRAGMA journal_mode").fetchone()[0]).lower() != "wal":
+        conn.execute("PRAGMA journal_mode=WAL")
+    for pragma in ingest_pragmas():
+        conn.execute(pragma)
     conn.executescript(SCHEMA_SQL)
+    if "info_refreshed_at" not in {col[1] for col in conn.execute("PRAGMA table_info(symbol_universe)")}:
+        conn.execute("ALTER TABLE symbol_universe ADD COLUMN info_refreshed_at TEXT")
+        conn.commit()
     return conn
 
 
+@contextmanager
+def write_tx(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    # joins an already open transaction
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+class BatchWriter:
+    """Background thread that owns every sqlite write for the duration of a ``with`` block.
+
+    Fetchers hand finished batches to ``submit``; the writer thread serializes payloads and runs
+    each ``fn(conn, ...)`` inside ``write_tx``, adding its return value to ``counts[counter]``.
+    The caller must not touch ``conn`` until the block exits (the connection has to be opened with
+    ``check_same_thread=False``). The first write error is re-raised from ``submit`` or on exit.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, maxsize: int = 64):
+        self.conn = conn
+        self.counts: dict[str, int] = {}
+        self._queue: queue.Queue[tuple[str, Callable[..., int], dict[str, Any]] | None] = queue.Queue(maxsize)
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+
+    def __enter__(self) -> BatchWriter:
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        self._queue.put(None)
+        self._thread.join()
+        if exc_type is None and self._error is not None:
+            raise self._error
+
+    def submit(self, counter: str, fn: Callable[..., int], **kwargs: Any) -> None:
+        if self._error is not None:
+            raise self._error
+        self._queue.put((counter, fn, kwargs))
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue  # drain remaining batches after a failure
+            counter, fn, kwargs = item
+            try:
+                with write_tx(self.conn):
+                    written = fn(self.conn, **kwargs)
+                self.counts[counter] = self.counts.get(counter, 0) + written
+            except BaseException as exc:  # noqa: BLE001
+                self._error = exc
+
+
 def upsert_run(conn: sqlite3.Connection, row: dict[str, Any]) -> None:
     conn.execute(
         """
@@ -640,187 +1089,430 @@ def upsert_run(conn: sqlite3.Connection, row: dict[str, Any]) -> None:
     )
 
 
-def upsert_symbol(conn: sqlite3.Connection, row: SymbolEntry) -> None:
-    conn.execute(
-        """
-        INSERT INTO symbol_universe (
-          stock_code, name, market, sector, dart_corp_code, listed_date, is_active, is_delisted, updated_at
-        ) VALUES (?, ?, ?, NULL, ?, ?, 1, 0, ?)
-        ON CONFLICT(stock_code) DO UPDATE SET
-          name=COALESCE(excluded.name, symbol_universe.name),
-          market=COALESCE(excluded.market, symbol_universe.market),
-          dart_corp_code=COALESCE(excluded.dart_corp_code, symbol_universe.dart_corp_code),
-          listed_date=COALESCE(excluded.listed_date, symbol_universe.listed_date),
-          updated_at=excluded.updated_at
-        """,
-        (
-            row.stock_code,
-            row.name,
-            row.market,
-            row.dart_corp_code,
-            to_iso_date(row.listed_date),
-            now_iso(),
-        ),
+def append_run_notes(conn: sqlite3.Connection, run_id: str, notes: list[str]) -> None:
+    start = conn.execute("SELECT COUNT(*) FROM ingest_run_notes WHERE run_id = ?", (run_id,)).fetchone()[0]
+    if start < len(notes):
+        conn.executemany(
+            "INSERT INTO ingest_run_notes (run_id, idx, message) VALUES (?, ?, ?)",
+            [(run_id, idx, notes[idx]) for idx in range(start, len(notes))],
+        )
+
+
+def checkpoint_run(conn: sqlite3.Connection, row: dict[str, Any], notes: list[str]) -> None:
+    with write_tx(conn):
+        append_run_notes(conn, row["run_id"], notes)
+        upsert_run(conn, row)
+
+
+_SYMBOL_CONFLICT_SQL = """
+ON CONFLICT(stock_code) DO UPDATE SET
+  name=COALESCE(excluded.name, symbol_universe.name),
+  market=COALESCE(excluded.market, symbol_universe.market),
+  dart_corp_code=COALESCE(excluded.dart_corp_code, symbol_universe.dart_corp_code),
+  listed_date=COALESCE(excluded.listed_date, symbol_universe.listed_date),
+  updated_at=excluded.updated_at,
+  info_refreshed_at=COALESCE(excluded.info_refreshed_at, symbol_universe.info_refreshed_at)
+"""
+# "WHERE true" keeps sqlite from parsing ON CONFLICT as a join constraint of the SELECT
+_SYMBOL_MERGE_SQL = (
+    """
+INSERT INTO symbol_universe (
+  stock_code, name, market, sector, dart_corp_code, listed_date, is_active, is_delisted, updated_at,
+  info_refreshed_at
+)
+SELECT stock_code, name, market, NULL, dart_corp_code, listed_date, 1, 0, updated_at, info_refreshed_at
+FROM temp.symbol_enrich WHERE true"""
+    + _SYMBOL_CONFLICT_SQL
+)
+
+
+def _symbol_params(row: SymbolEntry, updated_at: str) -> tuple[Any, ...]:
+    return (
+        row.stock_code,
+        row.name,
+        row.market,
+        row.dart_corp_code,
+        to_iso_date(row.listed_date),
+        updated_at,
+        row.info_refreshed_at,
     )
 
 
-def upsert_price(conn: sqlite3.Connection, run_id: str, row: dict[str, Any], as_of: str | None) -> None:
-    candle_at = to_iso_date(row.get("candle_at"))
-    if candle_at is None:
-        return
+def upsert_symbols_many(conn: sqlite3.Connection, entries: list[SymbolEntry], updated_at: str | None = None) -> int:
+    ts = updated_at or now_iso()
     conn.execute(
         """
-        INSERT INTO raw_price_ohlcv (
-          run_id, stock_code, timeframe, candle_at, open_price, high_price, low_price, close_price, volume, source,
-          as_of, collected_at, raw_payload
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(stock_code, timeframe, candle_at, source) DO UPDATE SET
-          run_id=excluded.run_id,
-          open_price=excluded.open_price,
-          high_price=excluded.high_price,
-          low_price=excluded.low_price,
-          close_price=excluded.close_price,
-          volume=excluded.volume,
-          as_of=excluded.as_of,
-          collected_at=excluded.collected_at,
-          raw_payload=excluded.raw_payload
-        """,
-        (
-            run_id,
-            row.get("symbol"),
-            row.get("timeframe", "D"),
-            candle_at,
-            float(row.get("open", 0) or 0),
-            float(row.get("high", 0) or 0),
-            float(row.get("low", 0) or 0),
-            float(row.get("close", 0) or 0),
-            float(row.get("volume", 0) or 0),
-            str(row.get("provider", "unknown")),
-            as_of,
-            now_iso(),
-            json.dumps(row.get("raw", {}), ensure_ascii=False),
-        ),
+        CREATE TEMP TABLE IF NOT EXISTS symbol_enrich (
+          stock_code TEXT PRIMARY KEY,
+          name TEXT,
+          market TEXT,
+          dart_corp_code TEXT,
+          listed_date TEXT,
+          updated_at TEXT NOT NULL,
+          info_refreshed_at TEXT
+        )
+        """
     )
+    try:
+        conn.executemany(
+            "INSERT OR REPLACE INTO temp.symbol_enrich VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [_symbol_params(e, ts) for e in entries],
+        )
+        conn.execute(_SYMBOL_MERGE_SQL)
+    finally:
+        conn.execute("DROP TABLE temp.symbol_enrich")
+    return len(entries)
 
 
-def upsert_fundamental(conn: sqlite3.Connection, run_id: str, row: dict[str, Any]) -> None:
-    conn.execute(
-        """
-        INSERT INTO raw_fundamental_statement (
-          run_id, stock_code, report_type, period_yyyymm, report_term, item_key, item_label, item_value, unit, currency,
-          source, source_key, collected_at, raw_payload
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(stock_code, report_type, period_yyyymm, item_key, source, source_key) DO UPDATE SET
-          run_id=excluded.run_id,
-          item_value=excluded.item_value,
-          item_label=excluded.item_label,
-          unit=excluded.unit,
-          currency=excluded.currency,
-          collected_at=excluded.collected_at,
-          raw_payload=excluded.raw_payload
-        """,
-        (
-            run_id,
-            row.get("symbol"),
-            row.get("report_type"),
-            row.get("period_yyyymm"),
-            row.get("report_term"),
-            row.get("item_key"),
-            row.get("item_label"),
-            row.get("item_value"),
-            row.get("unit"),
-            row.get("currency"),
-            row.get("source", "unknown"),
-            row.get("source_key"),
-            now_iso(),
-            json.dumps(row.get("raw", {}), ensure_ascii=False),
-        ),
+def load_fresh_symbol_info(
+    conn: sqlite3.Connection,
+    codes: list[str],
+    max_age_days: int = SYMBOL_INFO_TTL_DAYS,
+) -> dict[str, tuple[str, str, str]]:
+    # stock_code -> (market, listed_date, name)
+    since = (datetime.now(UTC) - timedelta(days=max_age_days)).isoformat()
+    found: dict[str, tuple[str, str, str]] = {}
+    for i in range(0, len(codes), 500):
+        chunk = codes[i : i + 500]
+        rows = conn.execute(
+            f"""
+            SELECT stock_code, market, listed_date, name FROM symbol_universe
+            WHERE stock_code IN ({", ".join("?" * len(chunk))})
+              AND market IS NOT NULL AND listed_date IS NOT NULL AND name IS NOT NULL
+              AND info_refreshed_at >= ?
+            """,
+            (*chunk, since),
+        )
+        for code, market, listed_date, name in rows:
+            listed = to_yyyymmdd(listed_date)
+            if listed:
+                found[code] = (market, listed, name)
+    return found
+
+
+@functools.lru_cache(maxsize=64)
+def _insert_values_sql(base_insert: str, cols: tuple[str, ...], conflict_clause: str, batch_len: int = 1) -> str:
+    placeholders = "(" + ", ".join(["?"] * len(cols)) + ")"
+    return f"{base_insert} ({', '.join(cols)}) VALUES " + ", ".join([placeholders] * batch_len) + conflict_clause
+
+
+def _bulk_upsert(
+    conn: sqlite3.Connection,
+    base_insert: str,
+    conflict_clause: str,
+    cols: tuple[str, ...],
+    rows: list[tuple[Any, ...]],
+    chunk_size: int,
+) -> int:
+    written = 0
+    full = len(rows) - len(rows) % chunk_size
+    if full:
+        written += conn.executemany(
+            _insert_values_sql(base_insert, cols, conflict_clause, chunk_size),
+            (tuple(itertools.chain.from_iterable(rows[i : i + chunk_size])) for i in range(0, full, chunk_size)),
+        ).rowcount
+    if full < len(rows):
+        written += conn.executemany(_insert_values_sql(base_insert, cols, conflict_clause), rows[full:]).rowcount
+    return written
+
+
+_PRICE_COLUMNS = (
+    "run_id", "stock_code", "timeframe", "candle_at", "open_price", "high_price", "low_price", "close_price", "volume",
+    "source", "as_of", "collected_at", "raw_payload",
+)
+_PRICE_CONFLICT_SQL = """
+ON CONFLICT(stock_code, timeframe, candle_at, source) DO UPDATE SET
+  run_id=excluded.run_id,
+  open_price=excluded.open_price,
+  high_price=excluded.high_price,
+  low_price=excluded.low_price,
+  close_price=excluded.close_price,
+  volume=excluded.volume,
+  as_of=excluded.as_of,
+  collected_at=excluded.collected_at,
+  raw_payload=excluded.raw_payload
+"""
+# stay below SQLite's historical 999 bound-variable limit
+_PRICE_CHUNK_SIZE = 900 // len(_PRICE_COLUMNS)
+
+_FUNDAMENTAL_COLUMNS = (
+    "run_id", "stock_code", "report_type", "period_yyyymm", "report_term", "item_key", "item_label", "item_value",
+    "unit", "currency", "source", "source_key", "collected_at", "raw_payload",
+)
+_FUNDAMENTAL_CONFLICT_SQL = """
+ON CONFLICT(stock_code, report_type, period_yyyymm, item_key, source, source_key) DO UPDATE SET
+  run_id=excluded.run_id,
+  item_value=excluded.item_value,
+  item_label=excluded.item_label,
+  unit=excluded.unit,
+  currency=excluded.currency,
+  collected_at=excluded.collected_at,
+  raw_payload=excluded.raw_payload
+"""
+_FUNDAMENTAL_CHUNK_SIZE = 900 // len(_FUNDAMENTAL_COLUMNS)
+
+_EVENT_UPSERT_SQL = """
+INSERT INTO raw_event_feed (
+  run_id, stock_code, event_time, event_type, severity, headline, summary, source, source_event_id, collected_at, raw_payload
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(source, source_event_id) DO UPDATE SET
+  run_id=excluded.run_id,
+  stock_code=excluded.stock_code,
+  event_time=excluded.event_time,
+  event_type=excluded.event_type,
+  severity=excluded.severity,
+  headline=excluded.headline,
+  summary=excluded.summary,
+  collected_at=excluded.collected_at,
+  raw_payload=excluded.raw_payload
+"""
+
+
+_std_json_dumps = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _json_dumps(obj: Any) -> str:
+    if _orjson is not None:
+        try:
+            return _orjson.dumps(obj).decode("utf-8")
+        except TypeError:  # e.g. non-str keys or >64-bit ints
+            pass
+    return _std_json_dumps(obj)
+
+
+def encode_raw_payload(raw: Any) -> str | bytes | None:
+    if _RAW_PAYLOAD_OFF:
+        return None
+    text = _json_dumps(raw)
+    if _RAW_PAYLOAD_ZLIB:
+        return sqlite3.Binary(zlib.compress(text.encode("utf-8")))
+    return text
+
+
+def _price_params(run_id: str, row: dict[str, Any], as_of: str | None, collected_at: str) -> tuple[Any, ...] | None:
+    candle_at = row.get("candle_at")
+    if not (type(candle_at) is str and _RE_ISO_DATE.fullmatch(candle_at)):
+        candle_at = to_iso_date(candle_at)
+        if candle_at is None:
+            return None
+    return (
+        run_id,
+        row.get("symbol"),
+        row.get("timeframe", "D"),
+        candle_at,
+        float(row.get("open", 0) or 0),
+        float(row.get("high", 0) or 0),
+        float(row.get("low", 0) or 0),
+        float(row.get("close", 0) or 0),
+        float(row.get("volume", 0) or 0),
+        str(row.get("provider", "unknown")),
+        as_of,
+        collected_at,
+        encode_raw_payload(row.get("raw", {})),
     )
 
 
-def upsert_event(conn: sqlite3.Connection, run_id: str, stock_code: str | None, row: dict[str, Any]) -> None:
-    conn.execute(
-        """
-        INSERT INTO raw_event_feed (
-          run_id, stock_code, event_time, event_type, severity, headline, summary, source, source_event_id, collected_at, raw_payload
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(source, source_event_id) DO UPDATE SET
-          run_id=excluded.run_id,
-          stock_code=excluded.stock_code,
-          event_time=excluded.event_time,
-          event_type=excluded.event_type,
-          severity=excluded.severity,
-          headline=excluded.headline,
-          summary=excluded.summary,
-          collected_at=excluded.collected_at,
-          raw_payload=excluded.raw_payload
-        """,
-        (
-            run_id,
-            stock_code,
-            row.get("event_time"),
-            row.get("event_type", "notice"),
-            int(row.get("severity", 3)),
-            row.get("headline", "event"),
-            row.get("summary"),
-            row.get("source", "unknown"),
-            row.get("source_event_id"),
-            now_iso(),
-            json.dumps(row.get("raw", {}), ensure_ascii=False),
-        ),
+def _fundamental_params(run_id: str, row: dict[str, Any], collected_at: str) -> tuple[Any, ...]:
+    return (
+        run_id,
+        row.get("symbol"),
+        row.get("report_type"),
+        row.get("period_yyyymm"),
+        row.get("report_term"),
+        row.get("item_key"),
+        row.get("item_label"),
+        row.get("item_value"),
+        row.get("unit"),
+        row.get("currency"),
+        row.get("source", "unknown"),
+        row.get("source_key"),
+        collected_at,
+        encode_raw_payload(row.get("raw", {})),
+    )
+
+
+def _event_params(run_id: str, stock_code: str | None, row: dict[str, Any], collected_at: str) -> tuple[Any, ...]:
+    return (
+        run_id,
+        stock_code,
+        row.get("event_time"),
+        row.get("event_type", "notice"),
+        int(row.get("severity", 3)),
+        row.get("headline", "event"),
+        row.get("summary"),
+        row.get("source", "unknown"),
+        row.get("source_event_id"),
+        collected_at,
+        encode_raw_payload(row.get("raw", {})),
     )
 
 
-def upsert_margin_policy(
+def upsert_prices_many(
     conn: sqlite3.Connection,
     run_id: str,
-    stock_code: str,
-    as_of: str,
-    is_full_margin: bool = False,
-    margin_rate_pct: float | None = None,
-    collection_status: str = "collected",
-    source_note: str | None = None,
-) -> None:
+    rows: list[dict[str, Any]],
+    as_of: str | None,
+    collected_at: str | None = None,
+    mode: Literal["upsert", "ignore"] = "upsert",
+) -> int:
+    ts = collected_at or now_iso()
+    params = [p for p in (_price_params(run_id, row, as_of, ts) for row in rows) if p is not None]
+    if not params:
+        return 0
+    if mode == "ignore":
+        # only rows that were not already stored count as written
+        return _bulk_upsert(
+            conn, "INSERT OR IGNORE INTO raw_price_ohlcv", "", _PRICE_COLUMNS, params, _PRICE_CHUNK_SIZE
+        )
+    return _bulk_upsert(
+        conn, "INSERT INTO raw_price_ohlcv", _PRICE_CONFLICT_SQL, _PRICE_COLUMNS, params, _PRICE_CHUNK_SIZE
+    )
+
+
+def split_price_history(
+    rows: list[dict[str, Any]],
+    history_before: str,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    history: list[dict[str, Any]] = []
+    recent: list[dict[str, Any]] = []
+    for r in rows:
+        candle_at = to_iso_date(r.get("candle_at"))
+        if r.get("timeframe", "D") == "D" and candle_at is not None and candle_at < history_before:
+            history.append(r)
+        else:
+            recent.append(r)
+    return history, recent
+
+
+def write_price_batch(
+    conn: sqlite3.Connection,
+    run_id: str,
+    rows: list[dict[str, Any]],
+    as_of: str | None,
+    staged: bool = False,
+    history_before: str | None = None,
+) -> int:
+    if staged:
+        return stage_prices_many(conn, run_id=run_id, rows=rows, as_of=as_of)
+    if history_before:
+        history, recent = split_price_history(rows, history_before)
+        written = upsert_prices_many(conn, run_id=run_id, rows=history, as_of=as_of, mode="ignore")
+        return written + upsert_prices_many(conn, run_id=run_id, rows=recent, as_of=as_of)
+    return upsert_prices_many(conn, run_id=run_id, rows=rows, as_of=as_of)
+
+
+_PRICE_STAGING_TABLE = "raw_price_ohlcv_bulk"
+
+
+def prepare_price_staging(conn: sqlite3.Connection) -> None:
+    # raw_price_ohlcv without the UNIQUE index
+    conn.execute(f"DROP TABLE IF EXISTS {_PRICE_STAGING_TABLE}")
+    conn.execute(f"CREATE TABLE {_PRICE_STAGING_TABLE} AS SELECT {', '.join(_PRICE_COLUMNS)} FROM raw_price_ohlcv WHERE 0")
+
+
+def stage_prices_many(
+    conn: sqlite3.Connection,
+    run_id: str,
+    rows: list[dict[str, Any]],
+    as_of: str | None,
+    collected_at: str | None = None,
+) -> int:
+    ts = collected_at or now_iso()
+    params = [p for p in (_price_params(run_id, row, as_of, ts) for row in rows) if p is not None]
+    if params:
+        _bulk_upsert(conn, f"INSERT INTO {_PRICE_STAGING_TABLE}", "", _PRICE_COLUMNS, params, _PRICE_CHUNK_SIZE)
+    return len(params)
+
+
+def merge_staged_prices(conn: sqlite3.Connection) -> None:
+    # insert in index key order
+    cols = ", ".join(_PRICE_COLUMNS)
     conn.execute(
-        """
-        INSERT INTO symbol_margin_policy (
-          run_id, stock_code, as_of, is_full_margin, margin_rate_pct, collection_status, source_note, collected_at
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(stock_code, as_of) DO UPDATE SET
-          run_id=excluded.run_id,
-          is_full_margin=excluded.is_full_margin,
-          margin_rate_pct=excluded.margin_rate_pct,
-          collection_status=excluded.collection_status,
-          source_note=excluded.source_note,
-          collected_at=excluded.collected_at
-        """,
-        (
-            run_id,
-            stock_code,
-            as_of,
-            1 if is_full_margin else 0,
-            margin_rate_pct,
-            collection_status,
-            source_note,
-            now_iso(),
-        ),
+        f"INSERT INTO raw_price_ohlcv ({cols}) SELECT {cols} FROM {_PRICE_STAGING_TABLE} "
+        "ORDER BY stock_code, timeframe, candle_at, source, rowid" + _PRICE_CONFLICT_SQL
     )
+    conn.execute(f"DROP TABLE {_PRICE_STAGING_TABLE}")
+    conn.execute("ANALYZE raw_price_ohlcv")
+
+
+def upsert_fundamentals_many(
+    conn: sqlite3.Connection,
+    run_id: str,
+    rows: list[dict[str, Any]],
+    collected_at: str | None = None,
+) -> int:
+    ts = collected_at or now_iso()
+    params = [_fundamental_params(run_id, row, ts) for row in rows]
+    if params:
+        _bulk_upsert(
+            conn,
+            "INSERT INTO raw_fundamental_statement",
+            _FUNDAMENTAL_CONFLICT_SQL,
+            _FUNDAMENTAL_COLUMNS,
+            params,
+            _FUNDAMENTAL_CHUNK_SIZE,
+        )
+    return len(params)
+
+
+def upsert_events_many(
+    conn: sqlite3.Connection,
+    run_id: str,
+    stock_code: str | None,
+    rows: list[dict[str, Any]],
+    collected_at: str | None = None,
+) -> int:
+    ts = collected_at or now_iso()
+    params = [_event_params(run_id, stock_code, row, ts) for row in rows]
+    if params:
+        conn.executemany(_EVENT_UPSERT_SQL, params)
+    return len(params)
+
+
+_MARGIN_UPSERT_SQL = """
+INSERT INTO symbol_margin_policy (
+  run_id, stock_code, as_of, is_full_margin, margin_rate_pct, collection_status, source_note, collected_at
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(stock_code, as_of) DO UPDATE SET
+  run_id=excluded.run_id,
+  is_full_margin=excluded.is_full_margin,
+  margin_rate_pct=excluded.margin_rate_pct,
+  collection_status=excluded.collection_status,
+  source_note=excluded.source_note,
+  collected_at=excluded.collected_at
+"""
+
+
+def _margin_params(run_id: str, as_of: str, policy: dict[str, Any], collected_at: str) -> tuple[Any, ...]:
+    return (
+        run_id,
+        policy["stock_code"],
+        as_of,
+        1 if policy.get("is_full_margin") else 0,
+        policy.get("margin_rate_pct"),
+        policy.get("collection_status") or "collected",
+        policy.get("source_note"),
+        collected_at,
+    )
+
+
+def upsert_margin_policies_many(
+    conn: sqlite3.Connection,
+    run_id: str,
+    as_of: str,
+    policies: list[dict[str, Any]],
+    collected_at: str | None = None,
+) -> int:
+    ts = collected_at or now_iso()
+    params = [_margin_params(run_id, as_of, policy, ts) for policy in policies]
+    if params:
+        conn.executemany(_MARGIN_UPSERT_SQL, params)
+    return len(params)
 
 
 def parse_symbols(args: argparse.Namespace) -> list[str]:
-    out: list[str] = []
-    for raw in list(args.symbol or []):
-        s = normalize_symbol(raw)
-        if s and s not in out:
-            out.append(s)
-    for token in str(args.symbols or "").split(","):
-        token = token.strip()
-        if not token:
-            continue
-        s = normalize_symbol(token)
-        if s and s not in out:
-            out.append(s)
-    return out
+    candidates = itertools.chain(args.symbol or [], (t for t in str(args.symbols or "").split(",") if t.strip()))
+    return list(dict.fromkeys(s for s in map(normalize_symbol, candidates) if s))
 
 
 def resolve_symbols(
@@ -843,6 +1535,10 @@ def resolve_symbols(
                 timeout=args.timeout,
                 dart_base_url=args.dart_base_url,
             )
+            unique: dict[str, SymbolEntry] = {}
+            for entry in entries:
+                unique.setdefault(entry.stock_code, entry)
+            entries = list(unique.values())
             notes.append(f"all scope symbols resolved via DART corpCode: {len(entries)}")
         else:
             rows = conn.execute("SELECT stock_code, name, market, dart_corp_code, listed_date FROM symbol_universe").fetchall()
@@ -870,20 +1566,26 @@ def resolve_symbols(
 
 def ensure_exported_env(args: argparse.Namespace) -> tuple[str | None, str | None, str | None]:
     run_type = str(args.run_type).strip().lower()
-    categories = RUN_TYPE_TO_CATEGORIES.get(run_type, ())
+    cats = set(RUN_TYPE_TO_CATEGORIES.get(run_type, ()))
     source_profile = str(args.source_profile).strip().lower()
     scope = str(args.scope).strip().lower()
     is_dry = bool(args.dry_run)
 
-    need_kis = any(cat in categories for cat in ("prices", "financials", "margins")) and source_profile in {"all", "kis"}
-    need_dart = (scope == "all") or ("events" in categories and source_profile in {"all", "dart"})
+    if RAW_PAYLOAD_MODE not in RAW_PAYLOAD_MODES:
+        raise SetupError(
+            f"STOCK_INGEST_RAW_PAYLOAD 값이 올바르지 않습니다: {RAW_PAYLOAD_MODE!r} (json | zlib | off 중 하나로 설정하세요)"
+        )
+
+    kis_profile = source_profile in {"all", "kis"}
+    need_kis = bool(cats & KIS_CATEGORIES) and kis_profile
+    need_dart = (scope == "all") or ("events" in cats and source_profile in {"all", "dart"})
     missing: list[str] = []
     if not is_dry and need_kis:
         if not (args.kis_app_key or "").strip():
             missing.append("KIS_APP_KEY")
         if not (args.kis_app_secret or "").strip():
             missing.append("KIS_APP_SECRET")
-    if not is_dry and "margins" in categories and source_profile in {"all", "kis"}:
+    if not is_dry and "margins" in cats and kis_profile:
         if not (args.kis_account_no or "").strip():
             missing.append("KIS_ACCOUNT_NO")
     if not is_dry and need_dart and not (args.dart_api_key or "").strip():
@@ -914,33 +1616,41 @@ def ensure_exported_env(args: argparse.Namespace) -> tuple[str | None, str | Non
     return args.kis_app_key, args.kis_app_secret, args.dart_api_key
 
 
-def derive_price_range(
-    args: argparse.Namespace,
-    symbol: SymbolEntry,
-) -> tuple[str | None, str | None]:
+@dataclass(frozen=True)
+class PriceRange:
+    preset_from: str | None
+    preset_to: str | None
+    needs_symbol_listed: bool = False  # full/backfill
+
+    def for_symbol(self, symbol: SymbolEntry) -> tuple[str | None, str | None]:
+        if self.needs_symbol_listed:
+            return symbol.listed_date or "19900101", self.preset_to
+        return self.preset_from, self.preset_to
+
+
+def derive_price_range(args: argparse.Namespace, today_d: date | None = None) -> PriceRange:
     explicit_from = to_yyyymmdd(args.as_of_from)
     explicit_to = to_yyyymmdd(args.as_of_to)
     if explicit_from or explicit_to:
-        return explicit_from, explicit_to
+        return PriceRange(explicit_from, explicit_to)
 
+    to_d = today_d or today()
+    today_str = to_d.strftime("%Y%m%d")
     if args.prices_lookback_days:
         d = int(args.prices_lookback_days)
-        to_d = today()
         from_d = to_d - timedelta(days=d)
-        return from_d.strftime("%Y%m%d"), to_d.strftime("%Y%m%d")
+        return PriceRange(from_d.strftime("%Y%m%d"), today_str)
 
     if args.prices_window in {"fast", "normal"}:
         days = PRICES_WINDOWS[args.prices_window]
-        to_d = today()
         from_d = to_d - timedelta(days=int(days))
-        return from_d.strftime("%Y%m%d"), to_d.strftime("%Y%m%d")
+        return PriceRange(from_d.strftime("%Y%m%d"), today_str)
 
     # full/backfill
     if args.prices_window == "full" or args.prices_backfill:
-        from_d = symbol.listed_date or "19900101"
-        return from_d, today().strftime("%Y%m%d")
+        return PriceRange(None, today_str, needs_symbol_listed=True)
 
-    return None, None
+    return PriceRange(None, None)
 
 
 def run_ingest(args: argparse.Namespace) -> tuple[int, dict[str, Any]]:
@@ -954,7 +1664,7 @@ def run_ingest(args: argparse.Namespace) -> tuple[int, dict[str, Any]]:
     except SetupError as exc:
         return 3, {"ok": False, "run_id": run_id, "status": "setup_required", "error": str(exc)}
 
-    conn = connect_sqlite(sqlite_path)
+    conn = connect_sqlite(sqlite_path, check_same_thread=False)
     row = {
         "run_id": run_id,
         "started_at": started_at,
@@ -974,7 +1684,7 @@ def run_ingest(args: argparse.Namespace) -> tuple[int, dict[str, Any]]:
         "fundamental_rows": 0,
         "event_rows": 0,
         "margin_rows": 0,
-        "notes_json": "[]",
+        "notes_json": None,  # see ingest_run_notes
         "error_message": None,
     }
     upsert_run(conn, row)
@@ -992,6 +1702,9 @@ def run_ingest(args: argparse.Namespace) -> tuple[int, dict[str, Any]]:
             "prices_backfill": args.prices_backfill,
             "as_of_from": args.as_of_from,
             "as_of_to": args.as_of_to,
+            "rebuild_index_after": args.rebuild_index_after,
+            "kis_concurrency": args.kis_concurrency,
+            "kis_max_rps": args.kis_max_rps,
             "sqlite_path": str(sqlite_path),
             "dry_run": True,
         }
@@ -999,11 +1712,9 @@ def run_ingest(args: argparse.Namespace) -> tuple[int, dict[str, Any]]:
             {
                 "finished_at": now_iso(),
                 "status": "success",
-                "notes_json": json.dumps(["dry-run"], ensure_ascii=False),
             }
         )
-        upsert_run(conn, row)
-        conn.commit()
+        checkpoint_run(conn, row, ["dry-run"])
         conn.close()
         return 0, {"ok": True, "run_id": run_id, "status": "success", "payload": payload}
 
@@ -1015,142 +1726,195 @@ def run_ingest(args: argparse.Namespace) -> tuple[int, dict[str, Any]]:
             base_url=args.kis_base_url,
             timeout=args.timeout,
             account_no=args.kis_account_no,
+            max_rps=args.kis_max_rps,
+            token_cache_path=sqlite_path,
         )
 
     status = "success"
     error_message: str | None = None
     try:
-        categories = RUN_TYPE_TO_CATEGORIES[args.run_type]
-        symbols = resolve_symbols(conn, args, notes, dart_api_key=dart_key)
-        row["symbols_count"] = len(symbols)
+        cat_mask = 0
+        for cat in RUN_TYPE_TO_CATEGORIES[args.run_type]:
+            cat_mask |= CATEGORY_BITS[cat]
+        staged = bool(cat_mask & CAT_PRICES and args.rebuild_index_after and args.scope == "all")
+        if staged:
+            # let the staged merge sort spill to disk; temp_store cannot change inside the run transaction
+            conn.execute("PRAGMA temp_store=FILE")
+        # the token cache has its own connection; settle it before the run transaction
+        if kis_client and (cat_mask & KIS_CATEGORY_MASK or (cat_mask & CAT_SYMBOLS and args.scope == "single")):
+            try:
+                kis_client.warm_token()
+            except Exception as exc:  # noqa: BLE001
+                notes.append(f"KIS token warm-up failed: {exc}")
+
+        with write_tx(conn):
+            symbols = resolve_symbols(conn, args, notes, dart_api_key=dart_key)
+            row["symbols_count"] = len(symbols)
 
-        # symbols stage
-        if "symbols" in categories:
-            for sym in symbols:
+            # symbols stage
+            if cat_mask & CAT_SYMBOLS:
                 # single scope and KIS available -> enrich symbol info
                 if kis_client and args.scope == "single":
-                    try:
-                        info = kis_client.fetch_stock_info(sym.stock_code)
-                        mket_id = str(info.get("mket_id_cd", "")).strip().upper()
+                    fresh = load_fresh_symbol_info(conn, [sym.stock_code for sym in symbols])
+                    stale = [sym for sym in symbols if sym.stock_code not in fresh]
+                    infos = fetch_all_stock_info(kis_client, stale, max_workers=args.kis_concurrency)
+                    enriched_at = now_iso()
+                    for sym in symbols:
+                        if sym.stock_code in fresh:
+                            sym.market, sym.listed_date, sym.name = fresh[sym.stock_code]
+                            continue
+                        info = infos[sym.stock_code]
+                        if isinstance(info, Exception):
+                            notes.append(f"symbol enrich failed {sym.stock_code}: {info}")
+                            continue
+                        mket_id = _clean_str(info.get("mket_id_cd")).upper()
                         if mket_id == "STK":
                             sym.market = "KOSPI"
                         elif mket_id == "KSQ":
                             sym.market = "KOSDAQ"
-                        listed = str(info.get("scts_mket_lstg_dt", "")).strip()
-                        if re.fullmatch(r"\d{8}", listed):
+                        listed = _clean_str(info.get("scts_mket_lstg_dt"))
+                        if len(listed) == 8 and listed.isdigit():
                             sym.listed_date = listed
-                        name = str(info.get("prdt_abrv_name", "")).strip()
+                        name = _clean_str(info.get("prdt_abrv_name"))
                         if name:
                             sym.name = name
-                    except Exception as exc:  # noqa: BLE001
-                        notes.append(f"symbol enrich failed {sym.stock_code}: {exc}")
+                        sym.info_refreshed_at = enriched_at
 
-                upsert_symbol(conn, sym)
-                row["symbol_rows"] += 1
-            conn.commit()
+                with write_tx(conn):
+                    row["symbol_rows"] += upsert_symbols_many(conn, symbols)
 
-        # prices stage
-        if "prices" in categories:
-            if not kis_client:
-                notes.append("prices skipped: KIS_APP_KEY/KIS_APP_SECRET not provided")
-            else:
-                timeframes = args.timeframes or ["D"]
-                for sym in symbols:
-                    date_from, date_to = derive_price_range(args, sym)
-                    for tf in timeframes:
-                        price_rows = kis_client.fetch_price_rows(
-                            symbol=sym.stock_code,
-                            timeframe=tf,
-                            date_from=date_from,
-                            date_to=date_to,
-                            max_pages=max(1, args.kis_max_price_pages),
-                        )
-                        for p in price_rows:
-                            upsert_price(conn, run_id=run_id, row=p, as_of=to_iso_date(args.as_of_to) or to_iso_date(args.as_of))
-                            row["price_rows"] += 1
-                    row["processed_symbols"] += 1
-                conn.commit()
-
-        # financials stage
-        if "financials" in categories:
-            if not kis_client:
-                notes.append("financials skipped: KIS_APP_KEY/KIS_APP_SECRET not provided")
-            else:
-                for sym in symbols:
-                    f_rows = kis_client.fetch_fundamental_rows(sym.stock_code)
-                    for f in f_rows:
-                        upsert_fundamental(conn, run_id=run_id, row=f)
-                        row["fundamental_rows"] += 1
-                conn.commit()
-
-        # events stage (DART)
-        if "events" in categories:
-            if not dart_key:
-                notes.append("events skipped: DART_API_KEY not provided")
-            else:
-                end_d = to_yyyymmdd(args.as_of_to) or today().strftime("%Y%m%d")
-                begin_d = to_yyyymmdd(args.as_of_from) or (today() - timedelta(days=30)).strftime("%Y%m%d")
-                for sym in symbols:
-                    if not sym.dart_corp_code:
-                        continue
-                    events = fetch_dart_events(
-                        api_key=dart_key,
-                        dart_base_url=args.dart_base_url,
-                        corp_code=sym.dart_corp_code,
-                        begin_date=begin_d,
-                        end_date=end_d,
-                        timeout=args.timeout,
+            # prices stage
+            if cat_mask & CAT_PRICES:
+                if not kis_client:
+                    notes.append("prices skipped: KIS_APP_KEY/KIS_APP_SECRET not provided")
+                else:
+                    timeframes = args.timeframes or ["D"]
+                    price_as_of = to_iso_date(args.as_of_to) or to_iso_date(args.as_of)
+                    price_today = today()
+                    history_before = (
+                        (price_today - timedelta(days=int(PRICES_WINDOWS["fast"]))).isoformat()
+                        if args.prices_backfill and not staged
+                        else None
                     )
-                    for event in events:
-                        upsert_event(conn, run_id=run_id, stock_code=sym.stock_code, row=event)
-                        row["event_rows"] += 1
-                conn.commit()
-
-        # margins stage
-        if "margins" in categories:
-            if args.source_profile not in {"all", "kis"}:
-                notes.append("margins skipped: source_profile does not include kis")
-            elif not kis_client:
-                notes.append("margins skipped: KIS_APP_KEY/KIS_APP_SECRET not provided")
-            else:
-                as_of = to_iso_date(args.as_of_to) or to_iso_date(args.as_of) or today().isoformat()
-                margin_rows = kis_client.fetch_margin_rows([sym.stock_code for sym in symbols])
-                collected_count = 0
-                failed_count = 0
-                for item in margin_rows:
-                    stock_code = normalize_symbol(str(item.get("symbol", "")).strip())
-                    if not stock_code:
-                        continue
-                    status_text = str(item.get("collection_status", "collected")).strip().lower() or "collected"
-                    if status_text == "collected":
-                        collected_count += 1
-                    else:
-                        failed_count += 1
-                    upsert_margin_policy(
-                        conn,
-                        run_id=run_id,
-                        stock_code=stock_code,
-                        as_of=as_of,
-                        is_full_margin=bool(item.get("is_full_margin")),
-                        margin_rate_pct=to_float_or_none(item.get("margin_rate_pct")),
-                        collection_status=status_text,
-                        source_note=str(item.get("message", "")).strip() or None,
+                    if staged:
+                        with write_tx(conn):
+                            prepare_price_staging(conn)
+                    writer = BatchWriter(conn)
+                    processed = 0
+                    with writer:
+                        for _sym, price_rows in fetch_all_prices(
+                            kis_client,
+                            symbols,
+                            timeframes,
+                            price_range=derive_price_range(args, price_today).for_symbol,
+                            max_pages=max(1, args.kis_max_price_pages),
+                            max_workers=args.kis_concurrency,
+                        ):
+                            writer.submit(
+                                "price_rows",
+                                write_price_batch,
+                                run_id=run_id,
+                                rows=price_rows,
+                                as_of=price_as_of,
+                                staged=staged,
+                                history_before=history_before,
+                            )
+                            processed += 1
+                    row["processed_symbols"] += processed
+                    row["price_rows"] += writer.counts.get("price_rows", 0)
+                    if staged:
+                        with write_tx(conn):
+                            merge_staged_prices(conn)
+
+            # financials stage
+            if cat_mask & CAT_FINANCIALS:
+                if not kis_client:
+                    notes.append("financials skipped: KIS_APP_KEY/KIS_APP_SECRET not provided")
+                else:
+                    writer = BatchWriter(conn)
+                    with writer:
+                        pending: list[dict[str, Any]] = []
+                        for _sym, f_rows in fetch_all_fundamentals(
+                            kis_client, symbols, max_workers=args.kis_concurrency
+                        ):
+                            pending.extend(f_rows)
+                            if len(pending) >= FUNDAMENTAL_BATCH_ROWS:
+                                writer.submit("fundamental_rows", upsert_fundamentals_many, run_id=run_id, rows=pending)
+                                pending = []
+                        if pending:
+                            writer.submit("fundamental_rows", upsert_fundamentals_many, run_id=run_id, rows=pending)
+                    row["fundamental_rows"] += writer.counts.get("fundamental_rows", 0)
+
+            # events stage (DART)
+            if cat_mask & CAT_EVENTS:
+                if not dart_key:
+                    notes.append("events skipped: DART_API_KEY not provided")
+                else:
+                    end_d = to_yyyymmdd(args.as_of_to) or today().strftime("%Y%m%d")
+                    begin_d = to_yyyymmdd(args.as_of_from) or (today() - timedelta(days=30)).strftime("%Y%m%d")
+                    writer = BatchWriter(conn)
+                    with writer:
+                        for sym in symbols:
+                            if not sym.dart_corp_code:
+                                continue
+                            events = iter_dart_events(
+                                api_key=dart_key,
+                                dart_base_url=args.dart_base_url,
+                                corp_code=sym.dart_corp_code,
+                                begin_date=begin_d,
+                                end_date=end_d,
+                                timeout=args.timeout,
+                            )
+                            while chunk := list(itertools.islice(events, EVENT_CHUNK_SIZE)):
+                                writer.submit(
+                                    "event_rows", upsert_events_many, run_id=run_id, stock_code=sym.stock_code, rows=chunk
+                                )
+                    row["event_rows"] += writer.counts.get("event_rows", 0)
+
+            # margins stage
+            if cat_mask & CAT_MARGINS:
+                if args.source_profile not in {"all", "kis"}:
+                    notes.append("margins skipped: source_profile does not include kis")
+                elif not kis_client:
+                    notes.append("margins skipped: KIS_APP_KEY/KIS_APP_SECRET not provided")
+                else:
+                    as_of = to_iso_date(args.as_of_to) or to_iso_date(args.as_of) or today().isoformat()
+                    margin_rows = fetch_all_margins(
+                        kis_client, [sym.stock_code for sym in symbols], max_workers=args.kis_concurrency
                     )
-                    row["margin_rows"] += 1
-                conn.commit()
-                notes.append(f"margins: collected={collected_count}, failed={failed_count}")
+                    codes = [normalize_symbol(_clean_str(item.get("symbol"))) for item in margin_rows]
+                    policies = [
+                        {
+                            "stock_code": code,
+                            "is_full_margin": bool(item.get("is_full_margin")),
+                            "margin_rate_pct": to_float_or_none(item.get("margin_rate_pct")),
+                            "collection_status": _clean_str(item.get("collection_status", "collected")).lower()
+                            or "collected",
+                            "source_note": _clean_str(item.get("message")) or None,
+                        }
+                        for code, item in zip(codes, margin_rows, strict=True)
+                        if code
+                    ]
+                    collected_count = sum(1 for policy in policies if policy["collection_status"] == "collected")
+                    failed_count = len(policies) - collected_count
+                    with write_tx(conn):
+                        row["margin_rows"] += upsert_margin_policies_many(conn, run_id, as_of, policies)
+                    notes.append(f"margins: collected={collected_count}, failed={failed_count}")
 
     except Exception as exc:  # noqa: BLE001
         status = "failed"
         error_message = str(exc)
         notes.append(f"error: {error_message}")
+        for key in ("processed_symbols", "symbol_rows", "price_rows", "fundamental_rows", "event_rows", "margin_rows"):
+            row[key] = 0
+    finally:
+        if kis_client:
+            kis_client.close()
 
     row["status"] = status
     row["finished_at"] = now_iso()
-    row["notes_json"] = json.dumps(notes, ensure_ascii=False)
     row["error_message"] = error_message
-    upsert_run(conn, row)
-    conn.commit()
+    checkpoint_run(conn, row, notes)
     conn.close()
 
     payload = {
@@ -1195,6 +1959,12 @@ def get_status(conn: sqlite3.Connection, run_id: str) -> dict[str, Any]:
     ).fetchone()
     if row is None:
         return {"ok": False, "error": f"run_id not found: {run_id}"}
+    notes = [
+        msg
+        for (msg,) in conn.execute("SELECT message FROM ingest_run_notes WHERE run_id = ? ORDER BY idx", (run_id,))
+    ]
+    if not notes and row[17]:
+        notes = json.loads(row[17])
     return {
         "ok": True,
         "run_id": row[0],
@@ -1216,20 +1986,21 @@ def get_status(conn: sqlite3.Connection, run_id: str) -> dict[str, Any]:
             "raw_event_feed": row[15],
             "symbol_margin_policy": row[16],
         },
-        "notes": json.loads(row[17]) if row[17] else [],
+        "notes": notes,
         "error": row[18],
     }
 
 
+_DB_CHECK_TABLES = ("raw_price_ohlcv", "raw_fundamental_statement", "raw_event_feed", "symbol_margin_policy")
+_DB_CHECK_SQL = "SELECT " + ", ".join(f"(SELECT COUNT(*) FROM {table} WHERE run_id = ?)" for table in _DB_CHECK_TABLES)
+
+
 def db_check(conn: sqlite3.Connection, run_id: str) -> dict[str, Any]:
     base = get_status(conn, run_id)
     if not base.get("ok"):
         return base
-    counts = {}
-    for table in ("raw_price_ohlcv", "raw_fundamental_statement", "raw_event_feed", "symbol_margin_policy"):
-        cnt = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE run_id = ?", (run_id,)).fetchone()[0]
-        counts[table] = int(cnt)
-    base["db_check"] = counts
+    found = conn.execute(_DB_CHECK_SQL, (run_id,) * len(_DB_CHECK_TABLES)).fetchone()
+    base["db_check"] = {table: int(cnt) for table, cnt in zip(_DB_CHECK_TABLES, found, strict=True)}
     return base
 
 
@@ -1258,6 +2029,9 @@ def build_parser() -> argparse.ArgumentParser:
     run.add_argument("--prices-lookback-days", type=int, default=None)
     run.add_argument("--prices-backfill", action="store_true", default=False)
     run.add_argument("--limit-symbols", type=int, default=None)
+    run.add_argument("--rebuild-index-after", action="store_true", default=False)
+    run.add_argument("--kis-concurrency", type=int, default=DEFAULT_KIS_WORKERS)
+    run.add_argument("--kis-max-rps", type=float, default=DEFAULT_KIS_MAX_RPS)
     run.add_argument("--dry-run", action="store_true", default=False)
 
     st = sub.add_parser("status", help="show run status from sqlite")
@@ -1275,6 +2049,12 @@ def print_payload(payload: dict[str, Any], json_mode: bool) -> None:
     if json_mode:
         print(json.dumps(payload, ensure_ascii=False))
         return
+    if _orjson is not None:
+        try:
+            print(_orjson.dumps(payload, option=_orjson.OPT_INDENT_2 | _orjson.OPT_NON_STR_KEYS).decode("utf-8"))
+            return
+        except TypeError:
+            pass
     print(json.dumps(payload, ensure_ascii=False, indent=2))
 
 